@@ -38,7 +38,7 @@ setup(
     ],
     keywords='install binary script deployment system administration',
     package_dir={'': 'src'},
-    packages=find_packages(where='src'),
+    packages=find_packages(where='src', include=['installer', 'installer.*']),
     python_requires='>=3.7',
     install_requires=[
         # No external dependencies required
@@ -47,11 +47,19 @@ setup(
         'dev': [
             'pytest>=7.0',
             'pytest-cov>=4.0',
+            'pytest-benchmark>=4.0',
+            'pytest-xdist>=3.0',
             'black>=22.0',
             'flake8>=5.0',
             'mypy>=1.0',
             'isort>=5.0',
         ],
+        'completion': [
+            'argcomplete>=2.0',
+        ],
+        'speedups': [
+            'orjson>=3.6',
+        ],
     },
     entry_points={
         'console_scripts': [
@@ -2,13 +2,18 @@
 installer: A secure tool for installing binaries and scripts system-wide
 """
 
+from typing import TYPE_CHECKING, Any
+
 __version__ = "1.0.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .installer import UniversalInstaller, HistoryManager
 from .exceptions import InstallationError, ValidationError, PermissionError
 
+if TYPE_CHECKING:
+    from .history import HistoryManager
+    from .installer import UniversalInstaller
+
 __all__ = [
     "UniversalInstaller",
     "HistoryManager",
@@ -16,3 +21,22 @@ __all__ = [
     "ValidationError",
     "PermissionError",
 ]
+
+# Heavy submodules are imported on first attribute access (PEP 562)
+_LAZY_ATTRIBUTES = {
+    "UniversalInstaller": ".installer",
+    "HistoryManager": ".history",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import heavy submodules on first use"""
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
@@ -1,17 +1,24 @@
+# PYTHON_ARGCOMPLETE_OK
 """
 Command-line interface for installer tool
 """
 
+import os
 import sys
-import argparse
 from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, List, Optional, Union
 
 from .constants import DEFAULT_INSTALL_DIR, USER_INSTALL_DIR
-from .installer import UniversalInstaller
 
+if TYPE_CHECKING:
+    import argparse
 
-def create_parser() -> argparse.ArgumentParser:
+
+def create_parser() -> "argparse.ArgumentParser":
     """Create and configure argument parser"""
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Install compiled binaries and Python scripts with history tracking",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -121,10 +128,68 @@ Note: This script requires sudo/root privileges for system-wide installation
     return parser
 
 
+def _parse_fast(argv: List[str]) -> Optional[SimpleNamespace]:
+    """Parse the most common invocations without building the argparse parser
+    
+    Handles ``FILE``, ``--history`` and ``--history --search QUERY``; returns
+    None for anything else so the caller falls back to the full parser.
+    """
+    file_path = None
+    history = False
+    search = None
+    
+    if len(argv) == 1 and not argv[0].startswith("-"):
+        file_path = argv[0]
+    elif argv == ["--history"]:
+        history = True
+    elif (len(argv) == 3 and argv[:2] == ["--history", "--search"]
+          and not argv[2].startswith("-")):
+        history = True
+        search = argv[2]
+    else:
+        return None
+    
+    # Same defaults as create_parser()
+    return SimpleNamespace(
+        file_path=file_path,
+        target_name=None,
+        force=False,
+        keep_extension=False,
+        install_dir=DEFAULT_INSTALL_DIR,
+        uninstall=None,
+        user=False,
+        install_self=False,
+        history=history,
+        all=False,
+        search=search,
+        history_file=None,
+    )
+
+
+def _autocomplete(parser: "argparse.ArgumentParser") -> None:
+    """Answer shell completion requests before the installer is imported"""
+    if "_ARGCOMPLETE" not in os.environ:
+        return
+    try:
+        import argcomplete
+    except ImportError:
+        return
+    # Exits the process once completions have been written
+    argcomplete.autocomplete(parser)
+
+
 def main() -> None:
     """Main entry point for CLI"""
-    parser = create_parser()
-    args = parser.parse_args()
+    args: Union[SimpleNamespace, "argparse.Namespace", None] = None
+    if "_ARGCOMPLETE" not in os.environ:
+        args = _parse_fast(sys.argv[1:])
+    if args is None:
+        parser = create_parser()
+        _autocomplete(parser)
+        args = parser.parse_args()
+    
+    # Imported here so completion and --help never load the installer machinery
+    from .installer import UniversalInstaller
     
     # Handle user installation mode
     if args.user:
@@ -169,7 +234,7 @@ def main() -> None:
     
     # Check if file path was provided for installation
     if not args.file_path:
-        parser.print_help()
+        create_parser().print_help()
         sys.exit(1)
     
     # Perform installation
@@ -11,10 +11,13 @@ USER_INSTALL_DIR = ".local/bin"
 HISTORY_FILE_NAME = "installer-history.json"
 HISTORY_DIR_SYSTEM = "/var/log"
 HISTORY_DIR_USER = ".local/share/installer"
+HISTORY_JOURNAL_SUFFIX = ".journal"
+HISTORY_JOURNAL_MAX_BYTES = 1024 * 1024  # Compact the journal past this size
+HISTORY_FSYNC_ENV = "INSTALLER_HISTORY_FSYNC"  # Set to "1" to fsync journal appends
 
 # File operation constants
 DEFAULT_PERMISSIONS = 0o755
-CHUNK_SIZE = 4096
+CHUNK_SIZE = 1 << 20  # 1 MiB per read when hashing or copying files
 
 # Platform-specific constants
 IS_WINDOWS = os.name == 'nt'
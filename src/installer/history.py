@@ -3,25 +3,107 @@ History management for installation tracking
 """
 
 import os
+import re
+import sys
 import json
 import fcntl
+import heapq
+import functools
 import tempfile
+from contextlib import contextmanager
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
+from types import ModuleType
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Iterable, Iterator, Tuple, cast
 
 from .constants import (
     HISTORY_DIR_SYSTEM,
     HISTORY_DIR_USER,
     HISTORY_FILE_NAME,
+    HISTORY_FSYNC_ENV,
+    HISTORY_JOURNAL_SUFFIX,
+    HISTORY_JOURNAL_MAX_BYTES,
 )
 from .exceptions import ValidationError, PermissionError, InstallationError
 
+# orjson (the "speedups" extra) is several times faster, especially when
+# indenting; both backends raise ValueError subclasses on malformed input
+orjson: Optional[ModuleType]
+try:
+    import orjson as _orjson
+    orjson = _orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, stringifying unknown types"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return cast(bytes, orjson.dumps(obj, default=str, option=option))
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """Parse UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+_REQUIRED_KEYS = frozenset({"installations", "uninstallations"})
+
+# Display banners are constant; build them once at import
+_SEP80 = "=" * 80
+_HR80 = "-" * 80
+_HEADER_ALL = f"\n{_SEP80}\n{'INSTALLATION HISTORY (ALL ACTIONS)':^80}\n{_SEP80}\n"
+_HEADER_INSTALLED = f"\n{_SEP80}\n{'CURRENTLY INSTALLED FILES':^80}\n{_SEP80}\n"
+_COLUMNS_INSTALLED = (
+    f"{'Status':6} {'Name':25} {'Type':8} {'Installed':16} {'User':10} {'Destination'}"
+)
+
+
+def _history_write_error(e: OSError) -> InstallationError:
+    """Translate an OSError raised while writing history"""
+    if e.errno == 28:  # ENOSPC
+        return InstallationError("No space left on device")
+    elif e.errno == 13:  # EACCES
+        return PermissionError(f"Permission denied writing history: {e}")
+    else:
+        return InstallationError(f"Failed to save history: {e}")
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of data to fd, retrying short writes"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_timestamp(timestamp: str, fmt: str) -> str:
+    """Reformat an ISO timestamp; memoized since listings repeat timestamps"""
+    return datetime.fromisoformat(timestamp).strftime(fmt)
+
 
 class HistoryManager:
-    """Manage installation/uninstallation history with thread-safe operations"""
+    """Manage installation/uninstallation history with thread-safe operations
+    
+    History is kept in a JSON snapshot plus an append-only JSON-Lines journal
+    next to it. New entries are appended to the journal; once it grows past
+    HISTORY_JOURNAL_MAX_BYTES it is folded back into the snapshot.
+    """
     
-    def __init__(self, history_file: Optional[str] = None) -> None:
+    def __init__(self, history_file: Optional[str] = None,
+                 durable: Optional[bool] = None) -> None:
+        # fsync every journal append only on request; without it the newest
+        # entries may be lost on power failure. Snapshots are always synced
+        if durable is None:
+            durable = os.environ.get(HISTORY_FSYNC_ENV) == "1"
+        self.durable = durable
+        
         if history_file:
             self.history_file = Path(history_file)
         else:
@@ -29,91 +111,234 @@ class HistoryManager:
             if os.geteuid() == 0:
                 self.history_file = Path(HISTORY_DIR_SYSTEM) / HISTORY_FILE_NAME
             else:
+                # Created by the first write, not here: constructing a
+                # manager must not touch the filesystem
                 config_dir = Path.home() / HISTORY_DIR_USER
-                config_dir.mkdir(parents=True, exist_ok=True)
                 self.history_file = config_dir / "history.json"
         
-        self.history = self.load_history()
+        self.journal_file = self.history_file.with_name(
+            self.history_file.name + HISTORY_JOURNAL_SUFFIX
+        )
+        # Parsed lazily: recording an entry only appends to the journal, so
+        # most commands never need to read the history at all
+        self._history: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        
+        # Recorded with every entry; resolved once per process
+        self._user = os.environ.get('SUDO_USER') or os.environ.get('USER') or 'unknown'
+        self._uid = os.getuid()
+    
+    @property
+    def history(self) -> Dict[str, List[Dict[str, Any]]]:
+        """History entries, loaded from disk on first access"""
+        if self._history is None:
+            self._history = self.load_history()
+        return self._history
+    
+    @history.setter
+    def history(self, value: Dict[str, List[Dict[str, Any]]]) -> None:
+        self._history = value
     
     def load_history(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load history from file with proper error handling"""
-        if self.history_file.exists():
+        """Load the history snapshot and replay the journal on top of it"""
+        try:
+            journal = open(self.journal_file, 'rb')
+        except FileNotFoundError:
+            return self._load_snapshot()
+        except OSError as e:
+            raise PermissionError(f"Cannot read history journal: {e}")
+        
+        with journal:
+            # Shared lock so a concurrent compaction cannot swap the snapshot
+            # between reading it and reading the journal
+            fcntl.flock(journal.fileno(), fcntl.LOCK_SH)
+            history = self._load_snapshot()
+            self._replay_journal(history, journal.read())
+        return history
+    
+    def _load_snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load the JSON snapshot with proper error handling"""
+        try:
+            # One bulk read; the parser takes the raw bytes without a text-mode wrapper
+            data = _loads(self.history_file.read_bytes())
+        except FileNotFoundError:
+            return {"installations": [], "uninstallations": []}
+        except ValueError as e:
+            # JSONDecodeError, or UnicodeDecodeError for non-UTF-8 content
+            raise ValidationError(f"Invalid JSON in history file: {e}")
+        except OSError as e:
+            raise PermissionError(f"Cannot read history file: {e}")
+
+        # Validate structure
+        if not isinstance(data, dict):
+            raise ValidationError("History file must contain a JSON object")
+        if not _REQUIRED_KEYS.issubset(data):
+            raise ValidationError("History file missing required keys")
+        return data
+    
+    @staticmethod
+    def _replay_journal(history: Dict[str, List[Dict[str, Any]]], data: bytes) -> None:
+        """Append journaled entries (one JSON object per line) to history"""
+        lines = data.split(b"\n")
+        for i, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = _loads(line)
+            except ValueError as e:
+                if i == len(lines):
+                    # Unterminated last line: an append torn by a crash or a
+                    # full disk. The entry was never completed, so drop it
+                    break
+                raise ValidationError(f"Invalid JSON in history journal: {e}")
+            if not isinstance(entry, dict):
+                raise ValidationError("History journal entries must be JSON objects")
+            
+            if entry.get("action") == "install":
+                history["installations"].append(entry)
+            else:
+                history["uninstallations"].append(entry)
+    
+    @contextmanager
+    def _locked_journal(self) -> Iterator[int]:
+        """Open the journal for appending and hold an exclusive lock on it"""
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.journal_file, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
             try:
-                with open(self.history_file, 'r') as f:
-                    data = json.load(f)
-                    # Validate structure
-                    if not isinstance(data, dict):
-                        raise ValidationError("History file must contain a JSON object")
-                    if "installations" not in data or "uninstallations" not in data:
-                        raise ValidationError("History file missing required keys")
-                    return data
-            except json.JSONDecodeError as e:
-                raise ValidationError(f"Invalid JSON in history file: {e}")
-            except OSError as e:
-                raise PermissionError(f"Cannot read history file: {e}")
-        return {"installations": [], "uninstallations": []}
+                yield fd
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
     
     def save_history(self) -> None:
-        """Save history to file with file locking to prevent race conditions"""
+        """Fold the journal into the snapshot and reload history from disk
+        
+        History is only changed through the add_* methods, which journal
+        every entry; anything else assigned to ``history`` is discarded.
+        """
+        try:
+            with self._locked_journal() as journal_fd:
+                # Fold what is on disk, not the in-memory copy, which may be
+                # missing entries journaled by other processes since loading
+                self._compact(journal_fd)
+        except OSError as e:
+            raise _history_write_error(e)
+    
+    def _write_snapshot(self, history: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Atomically replace the snapshot with the given history"""
+        # Serialize up front so the file is written with a single write()
+        data = _dumps(history, indent=True)
+        
+        # Use atomic write with temporary file
+        temp_fd, temp_path = tempfile.mkstemp(
+            dir=self.history_file.parent,
+            prefix=".history_",
+            suffix=".tmp"
+        )
+        
         try:
-            # Ensure directory exists
-            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            # No lock on the temp file: nobody else can open it, and writers
+            # are serialized by the journal lock held by the caller
+            with os.fdopen(temp_fd, 'wb') as f:
+                # Set permissions on the open descriptor, before moving
+                os.fchmod(f.fileno(), 0o644)
+                f.write(data)
+                f.flush()
+                # Always synced: compaction truncates the journal right after
+                # the replace, so a snapshot lost in a crash loses its entries
+                os.fsync(f.fileno())
             
-            # Use atomic write with temporary file
-            temp_fd, temp_path = tempfile.mkstemp(
-                dir=self.history_file.parent,
-                prefix=".history_",
-                suffix=".tmp"
-            )
+            # Atomic move
+            os.replace(temp_path, self.history_file)
             
+        except Exception:
+            # Clean up temp file on error
             try:
-                with os.fdopen(temp_fd, 'w') as f:
-                    # Acquire exclusive lock
-                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                    try:
-                        json.dump(self.history, f, indent=2, default=str)
-                        f.flush()
-                        os.fsync(f.fileno())
-                    finally:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                
-                # Set appropriate permissions before moving
-                os.chmod(temp_path, 0o644)
-                
-                # Atomic move
-                os.replace(temp_path, self.history_file)
-                
-            except Exception:
-                # Clean up temp file on error
-                try:
-                    os.unlink(temp_path)
-                except OSError:
-                    pass
-                raise
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    def _append_entries(self, key: str, entries: List[Dict[str, Any]]) -> None:
+        """Record entries in memory and append them to the journal in one write"""
+        if self._history is not None:
+            self._history[key].extend(entries)
+        data = b"".join(_dumps(entry) + b"\n" for entry in entries)
+        
+        try:
+            with self._locked_journal() as journal_fd:
+                self._repair_torn_tail(journal_fd)
+                _write_all(journal_fd, data)
+                if self.durable:
+                    os.fsync(journal_fd)
                 
+                if os.fstat(journal_fd).st_size >= HISTORY_JOURNAL_MAX_BYTES:
+                    self._compact(journal_fd)
         except OSError as e:
-            if e.errno == 28:  # ENOSPC
-                raise InstallationError("No space left on device")
-            elif e.errno == 13:  # EACCES
-                raise PermissionError(f"Permission denied writing history: {e}")
-            else:
-                raise InstallationError(f"Failed to save history: {e}")
+            raise _history_write_error(e)
+    
+    @staticmethod
+    def _repair_torn_tail(journal_fd: int) -> None:
+        """Make the journal end with a newline before appending to it
+        
+        A torn last line would otherwise swallow the next entry. A complete
+        entry missing only its newline is terminated; a partial one is cut.
+        """
+        size = os.fstat(journal_fd).st_size
+        if not size or os.pread(journal_fd, 1, size - 1) == b"\n":
+            return
+        
+        data = os.pread(journal_fd, size, 0)
+        end = data.rfind(b"\n") + 1
+        try:
+            _loads(data[end:])
+        except ValueError:
+            os.ftruncate(journal_fd, end)
+        else:
+            _write_all(journal_fd, b"\n")
+    
+    def _compact(self, journal_fd: int) -> None:
+        """Fold the journal into the snapshot; the caller holds the journal lock"""
+        # Re-read from disk so entries journaled by other processes are kept
+        with open(self.journal_file, 'rb') as journal:
+            data = journal.read()
+        history = self._load_snapshot()
+        self._replay_journal(history, data)
+        
+        self.history = history
+        self._write_snapshot(history)
+        os.ftruncate(journal_fd, 0)
     
     def add_installation(self, source_path: Path, target_path: Path, 
                         file_type: str, checksum: Optional[str] = None) -> None:
         """Record an installation"""
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "action": "install",
-            "source": str(source_path),
-            "target": str(target_path),
-            "type": file_type,
-            "checksum": checksum,
-            "user": os.environ.get('SUDO_USER', os.environ.get('USER', 'unknown')),
-            "uid": os.getuid(),
-        }
-        self.history["installations"].append(entry)
-        self.save_history()
+        self.add_installations([(source_path, target_path, file_type, checksum)])
+    
+    def add_installations(
+        self, installations: Iterable[Tuple[Path, Path, str, Optional[str]]]
+    ) -> None:
+        """Record several installations with one timestamp and one journal write
+        
+        Each item is a ``(source_path, target_path, file_type, checksum)`` tuple.
+        """
+        timestamp = datetime.now().isoformat()
+        entries = [
+            {
+                "timestamp": timestamp,
+                "action": "install",
+                "source": str(source_path),
+                "target": str(target_path),
+                "type": file_type,
+                "checksum": checksum,
+                "user": self._user,
+                "uid": self._uid,
+            }
+            for source_path, target_path, file_type, checksum in installations
+        ]
+        if entries:
+            self._append_entries("installations", entries)
     
     def add_uninstallation(self, target_path: Path) -> None:
         """Record an uninstallation"""
@@ -121,54 +346,60 @@ class HistoryManager:
             "timestamp": datetime.now().isoformat(),
             "action": "uninstall",
             "target": str(target_path),
-            "user": os.environ.get('SUDO_USER', os.environ.get('USER', 'unknown')),
-            "uid": os.getuid(),
+            "user": self._user,
+            "uid": self._uid,
         }
-        self.history["uninstallations"].append(entry)
-        self.save_history()
+        self._append_entries("uninstallations", [entry])
     
     def get_installed_files(self) -> Dict[str, Dict[str, Any]]:
         """Get list of currently installed files based on history"""
-        installed = {}
+        # Walk all events newest first and keep the first one seen per target,
+        # so a reinstall after an uninstall counts as installed. The lists are
+        # not guaranteed to be in timestamp order (concurrent writers, clock
+        # steps), so sort once rather than merge. The sort is stable: on equal
+        # timestamps uninstallations come first, mirroring a forward replay;
+        # entries without a timestamp sort as oldest.
+        events = sorted(chain(reversed(self.history["uninstallations"]),
+                              reversed(self.history["installations"])),
+                        key=lambda e: e.get("timestamp", ""), reverse=True)
+        latest: Dict[str, Dict[str, Any]] = {}
+        for entry in events:
+            latest.setdefault(entry["target"], entry)
         
-        # Track all installations
-        for entry in self.history["installations"]:
-            target = entry["target"]
-            installed[target] = entry
-        
-        # Remove uninstalled files
-        for entry in self.history["uninstallations"]:
-            target = entry["target"]
-            installed.pop(target, None)
+        installed = {target: entry for target, entry in latest.items()
+                     if entry.get("action") != "uninstall"}
         
         return installed
     
     def display_history(self, show_all: bool = False, limit: int = 20) -> None:
         """Display installation history"""
+        # The report is assembled in memory and written to stdout once
+        lines: List[str] = []
+        
         if show_all:
-            # Combine and sort all entries
-            all_entries = []
-            for entry in self.history["installations"]:
-                all_entries.append(entry)
-            for entry in self.history["uninstallations"]:
-                all_entries.append(entry)
+            installations = self.history["installations"]
+            uninstallations = self.history["uninstallations"]
+            total = len(installations) + len(uninstallations)
             
-            # Sort by timestamp
-            all_entries.sort(key=lambda x: x["timestamp"], reverse=True)
-            
-            if not all_entries:
+            if not total:
                 print("No history found.")
                 return
             
-            print(f"\n{'='*80}")
-            print(f"{'INSTALLATION HISTORY (ALL ACTIONS)':^80}")
-            print(f"{'='*80}\n")
+            # Newest first; with a limit only the top entries are selected,
+            # without copying and sorting the whole history
+            all_entries = chain(installations, uninstallations)
+            if limit:
+                shown = heapq.nlargest(limit, all_entries, key=itemgetter("timestamp"))
+            else:
+                shown = sorted(all_entries, key=itemgetter("timestamp"), reverse=True)
+            
+            lines.append(_HEADER_ALL)
             
-            for entry in all_entries[:limit] if limit else all_entries:
-                self._print_entry(entry)
+            for entry in shown:
+                lines.append(self._format_entry(entry))
             
-            if limit and len(all_entries) > limit:
-                print(f"\n(Showing last {limit} entries. Use --all to see everything)")
+            if limit and total > limit:
+                lines.append(f"\n(Showing last {limit} entries. Use --all to see everything)")
         
         else:
             # Show currently installed files
@@ -178,18 +409,16 @@ class HistoryManager:
                 print("No files currently tracked as installed.")
                 return
             
-            print(f"\n{'='*80}")
-            print(f"{'CURRENTLY INSTALLED FILES':^80}")
-            print(f"{'='*80}\n")
+            lines.append(_HEADER_INSTALLED)
             
             # Sort by installation date
             sorted_installed = sorted(installed.items(), 
                                     key=lambda x: x[1].get("timestamp", ""), 
                                     reverse=True)
             
-            # Print header
-            print(f"{'Status':6} {'Name':25} {'Type':8} {'Installed':16} {'User':10} {'Destination'}")
-            print("-" * 80)
+            # Header
+            lines.append(_COLUMNS_INSTALLED)
+            lines.append(_HR80)
             
             for target, entry in sorted_installed:
                 target_path = Path(target)
@@ -197,22 +426,22 @@ class HistoryManager:
                 
                 timestamp = entry.get("timestamp", "unknown")
                 if timestamp != "unknown":
-                    dt = datetime.fromisoformat(timestamp)
-                    timestamp = dt.strftime("%Y-%m-%d %H:%M")
+                    timestamp = _format_timestamp(timestamp, "%Y-%m-%d %H:%M")
                 
-                print(f"{exists:6} {target_path.name:25} {entry.get('type', 'unknown'):8} "
-                      f"{timestamp:16} {entry.get('user', 'unknown'):10} {target}")
+                lines.append(f"{exists:6} {target_path.name:25} {entry.get('type', 'unknown'):8} "
+                             f"{timestamp:16} {entry.get('user', 'unknown'):10} {target}")
             
-            print(f"\n{'='*80}")
-            print(f"Legend: ✓ = exists, ✗ = missing")
-            print(f"Total: {len(installed)} files tracked")
+            lines.append(f"\n{_SEP80}")
+            lines.append(f"Legend: ✓ = exists, ✗ = missing")
+            lines.append(f"Total: {len(installed)} files tracked")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     
-    def _print_entry(self, entry: Dict[str, Any]) -> None:
-        """Print a single history entry"""
+    def _format_entry(self, entry: Dict[str, Any]) -> str:
+        """Format a single history entry as one multi-line string"""
         timestamp = entry.get("timestamp", "unknown")
         if timestamp != "unknown":
-            dt = datetime.fromisoformat(timestamp)
-            timestamp = dt.strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = _format_timestamp(timestamp, "%Y-%m-%d %H:%M:%S")
         
         action = entry.get("action", "unknown")
         symbol = "📦" if action == "install" else "🗑️"
@@ -220,38 +449,44 @@ class HistoryManager:
         target = Path(entry.get("target", "unknown"))
         user = entry.get("user", "unknown")
         
-        print(f"{symbol} [{timestamp}] {action.upper():10} {target.name:25} by {user}")
+        lines = [f"{symbol} [{timestamp}] {action.upper():10} {target.name:25} by {user}"]
         
         if action == "install":
             if "source" in entry:
-                print(f"   Source: {entry['source']}")
-            print(f"   Destination: {entry.get('target', 'unknown')}")
-            print(f"   Type: {entry.get('type', 'unknown')}")
+                lines.append(f"   Source: {entry['source']}")
+            lines.append(f"   Destination: {entry.get('target', 'unknown')}")
+            lines.append(f"   Type: {entry.get('type', 'unknown')}")
             if "checksum" in entry and entry["checksum"]:
-                print(f"   Checksum: {entry['checksum'][:16]}...")
+                lines.append(f"   Checksum: {entry['checksum'][:16]}...")
+        
+        return "\n".join(lines)
     
     def search_history(self, query: str) -> None:
         """Search history for specific files or patterns"""
         results = []
-        query_lower = query.lower()
+        # One case-insensitive scan per field instead of lowercasing copies
+        matches = re.compile(re.escape(query), re.IGNORECASE).search
         
         for entry in self.history["installations"]:
-            if (query_lower in entry.get("target", "").lower() or 
-                query_lower in entry.get("source", "").lower()):
+            if matches(entry.get("target", "")) or matches(entry.get("source", "")):
                 results.append(entry)
         
         for entry in self.history["uninstallations"]:
-            if query_lower in entry.get("target", "").lower():
+            if matches(entry.get("target", "")):
                 results.append(entry)
         
         if not results:
             print(f"No history entries found matching '{query}'")
             return
         
-        print(f"\n{'='*80}")
-        print(f"SEARCH RESULTS FOR: {query}")
-        print(f"{'='*80}\n")
+        lines = [
+            f"\n{_SEP80}",
+            f"SEARCH RESULTS FOR: {query}",
+            f"{_SEP80}\n",
+        ]
         
         results.sort(key=lambda x: x["timestamp"], reverse=True)
         for entry in results:
-            self._print_entry(entry)
+            lines.append(self._format_entry(entry))
+        
+        sys.stdout.write("\n".join(lines) + "\n")
@@ -0,0 +1,53 @@
+"""
+Shared pytest fixtures
+"""
+
+import re
+import uuid
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def _tmp_root(tmp_path_factory):
+    """One unnumbered base directory for every test's tmp_path"""
+    return tmp_path_factory.mktemp("inst", numbered=False)
+
+
+@pytest.fixture
+def tmp_path(_tmp_root, request):
+    """Per-test temporary directory, overriding pytest's built-in fixture
+
+    pytest probes numbered names for every test; here each test gets a
+    directory named after it plus a random suffix, created with one mkdir.
+    """
+    name = re.sub(r"\W", "_", request.node.name)[:30]
+    path = _tmp_root / f"{name}-{uuid.uuid4().hex[:8]}"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    """Path of a history file in a fresh temporary directory
+
+    The file itself is not created: HistoryManager treats a missing file as
+    empty history and writes nothing until the first entry is recorded.
+    """
+    return tmp_path / "history.json"
+
+
+@pytest.fixture
+def installer_dir(tmp_path):
+    """Installation directory for a UniversalInstaller under test
+
+    Not created up front; tests that need it call create_install_dir().
+    """
+    return tmp_path / "bin"
+
+
+@pytest.fixture
+def installer(installer_dir):
+    """A UniversalInstaller targeting installer_dir"""
+    from src.installer.installer import UniversalInstaller
+    return UniversalInstaller(str(installer_dir))
@@ -0,0 +1,36 @@
+"""
+Test data shared by the test modules
+"""
+
+import hashlib
+import re
+from types import MappingProxyType
+
+# Test file contents, written with write_bytes
+PY_SCRIPT = b"#!/usr/bin/env python3\nprint('hello')\n"
+PY_SOURCE = b"print('hello')\n"
+BASH_SCRIPT = b"#!/bin/bash\necho hello\n"
+ELF_HEADER = b"\x7fELF"
+BIN_BLOB = b"binary content"
+HELLO_BYTES = b"Hello, World!"
+
+EXPECTED_HELLO_SHA256 = hashlib.sha256(HELLO_BYTES).hexdigest()
+
+# History of a manager with nothing recorded; read-only so tests can share it
+EMPTY_HISTORY = MappingProxyType({"installations": [], "uninstallations": []})
+
+# pytest.raises match patterns, compiled once
+BECAME_SYMLINK_RE = re.compile("became a symlink")
+FAILED_CREATE_RE = re.compile("Failed to create directory")
+INVALID_HISTORY_JSON_RE = re.compile("Invalid JSON in history file")
+INVALID_JOURNAL_RE = re.compile("Invalid JSON in history journal")
+INVALID_JSON_RE = re.compile("Invalid JSON")
+LINK_RE = re.compile("symlink or hardlink")
+MISSING_KEYS_RE = re.compile("missing required keys")
+MODIFIED_RE = re.compile("File was modified during operation")
+NO_SPACE_RE = re.compile("No space left on device")
+NO_WRITE_PERMISSION_RE = re.compile("No write permission")
+NOT_EXIST_RE = re.compile("does not exist")
+OUTSIDE_RE = re.compile("outside allowed directory")
+PERMISSION_DENIED_RE = re.compile("Permission denied")
+SYMLINK_RE = re.compile("symlinks are not allowed")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmarks guarding the history serialization and checksum hot paths
+
+Requires pytest-benchmark; skipped when it is not installed. Each benchmark
+fails when its mean exceeds a ceiling set well above the expected time, so
+only real regressions trip it; use --benchmark-compare for finer tracking.
+"""
+
+import pytest
+from pathlib import Path
+
+pytest.importorskip("pytest_benchmark")
+
+from src.installer.history import HistoryManager
+
+pytestmark = pytest.mark.slow
+
+HISTORY_ENTRIES = 1000
+CHECKSUM_FILE_SIZE = 10 * 1024 * 1024
+
+# Mean time ceilings in seconds, ~100x the times measured on a laptop
+SAVE_MAX_MEAN = 0.25
+LOAD_MAX_MEAN = 0.25
+CHECKSUM_MAX_MEAN = 1.0
+
+
+def assert_mean_below(benchmark, seconds):
+    """Fail if the benchmark's mean round time exceeds seconds
+
+    Nothing is measured when benchmarking is disabled (--benchmark-disable,
+    or automatically under xdist), so there is nothing to check then.
+    """
+    if benchmark.stats is not None:
+        assert benchmark.stats.stats.mean < seconds
+
+
+def test_save_history(benchmark, history_file):
+    """Benchmark serializing and writing a snapshot of a 1000-entry history"""
+    history = HistoryManager(str(history_file))
+    history.add_installations(
+        (Path(f"/tmp/source{i}.py"), Path(f"/usr/local/bin/tool{i}"), "python", "0" * 64)
+        for i in range(HISTORY_ENTRIES)
+    )
+
+    history.save_history()
+
+    # Time the write alone: save_history also re-reads the snapshot and
+    # journal to fold them, which test_load_history already covers
+    benchmark(history._write_snapshot, history.history)
+
+    assert_mean_below(benchmark, SAVE_MAX_MEAN)
+    assert len(HistoryManager(str(history_file)).history["installations"]) == HISTORY_ENTRIES
+
+
+def test_load_history(benchmark, history_file):
+    """Benchmark parsing a 1000-entry history snapshot"""
+    history = HistoryManager(str(history_file))
+    history.add_installations(
+        (Path(f"/tmp/source{i}.py"), Path(f"/usr/local/bin/tool{i}"), "python", "0" * 64)
+        for i in range(HISTORY_ENTRIES)
+    )
+    history.save_history()
+
+    loaded = benchmark(history.load_history)
+
+    assert_mean_below(benchmark, LOAD_MAX_MEAN)
+    assert len(loaded["installations"]) == HISTORY_ENTRIES
+
+
+def test_calculate_checksum(benchmark, tmp_path, installer_dir):
+    """Benchmark hashing a 10 MB file"""
+    from src.installer.installer import UniversalInstaller
+
+    installer = UniversalInstaller(str(installer_dir))
+    payload = tmp_path / "payload.bin"
+    payload.write_bytes(b"\0" * CHECKSUM_FILE_SIZE)
+
+    checksum = benchmark(installer.calculate_checksum, payload)
+
+    assert_mean_below(benchmark, CHECKSUM_MAX_MEAN)
+    assert len(checksum) == 64
@@ -5,14 +5,11 @@ Test suite for CLI functionality
 
 import pytest
 import sys
-import os
+import types
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 
-# Add the parent directory to the path to import our module
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from src.installer.cli import create_parser, main
+from src.installer.cli import create_parser, main, _parse_fast
 from src.installer import ValidationError
 
 
@@ -50,12 +47,55 @@ class TestCLIParser:
         assert args.history is False
         assert args.all is False
         assert args.install_dir == "/usr/local/bin"
+    
+    @pytest.mark.parametrize("argv", [
+        ["myfile.py"],
+        ["--history"],
+        ["--history", "--search", "myapp"],
+    ])
+    def test_fast_path_matches_parser(self, argv):
+        """Test that the argparse-free fast path agrees with the full parser"""
+        assert vars(_parse_fast(argv)) == vars(create_parser().parse_args(argv))
+    
+    @pytest.mark.parametrize("argv", [
+        [],
+        ["--help"],
+        ["myfile.py", "--force"],
+        ["--history", "--all"],
+        ["--history", "--search", "-x"],
+        ["-"],
+    ])
+    def test_fast_path_falls_back(self, argv):
+        """Test that anything outside the fast path is left to argparse"""
+        assert _parse_fast(argv) is None
+
+    def test_completion_uses_full_parser(self, monkeypatch):
+        """Test that completion builds the full parser before importing the installer"""
+        completed = []
+
+        def autocomplete(parser):
+            # argcomplete prints the completions and exits at this point
+            completed.append(parser)
+            raise SystemExit(0)
+
+        monkeypatch.setitem(sys.modules, "argcomplete",
+                            types.SimpleNamespace(autocomplete=autocomplete))
+        monkeypatch.delitem(sys.modules, "src.installer.installer", raising=False)
+        monkeypatch.setenv("_ARGCOMPLETE", "1")
+        monkeypatch.setattr(sys, "argv", ["installer", "--history"])
+
+        with pytest.raises(SystemExit):
+            main()
+
+        assert len(completed) == 1
+        assert "--history-file" in completed[0]._option_string_actions
+        assert "src.installer.installer" not in sys.modules
 
 
 class TestCLIMain:
     """Test main CLI functionality"""
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     def test_history_mode(self, mock_installer_class):
         """Test history display mode"""
         mock_installer = MagicMock()
@@ -68,7 +108,7 @@ class TestCLIMain:
         assert exc_info.value.code == 0
         mock_installer.history.display_history.assert_called_once_with(show_all=False)
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     def test_history_search_mode(self, mock_installer_class):
         """Test history search mode"""
         mock_installer = MagicMock()
@@ -81,7 +121,7 @@ class TestCLIMain:
         assert exc_info.value.code == 0
         mock_installer.history.search_history.assert_called_once_with('myapp')
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     def test_user_mode(self, mock_installer_class):
         """Test user installation mode"""
         mock_installer = MagicMock()
@@ -95,7 +135,7 @@ class TestCLIMain:
         # Should use user directory
         assert mock_installer_class.call_args[0][0] == Path.home() / ".local/bin"
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     @patch('builtins.print')
     def test_privilege_check_failure(self, mock_print, mock_installer_class):
         """Test privilege check when not running as root"""
@@ -111,7 +151,7 @@ class TestCLIMain:
         # Should print error message
         assert any("sudo/root privileges" in str(call) for call in mock_print.call_args_list)
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     def test_install_self_mode(self, mock_installer_class):
         """Test self-installation mode"""
         mock_installer = MagicMock()
@@ -125,7 +165,7 @@ class TestCLIMain:
         assert exc_info.value.code == 0
         mock_installer.install_self.assert_called_once()
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     def test_uninstall_mode(self, mock_installer_class):
         """Test uninstallation mode"""
         mock_installer = MagicMock()
@@ -140,7 +180,7 @@ class TestCLIMain:
         assert exc_info.value.code == 0
         mock_installer.uninstall_file.assert_called_once_with('myapp')
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     def test_install_file_mode(self, mock_installer_class):
         """Test normal file installation mode"""
         mock_installer = MagicMock()
@@ -160,7 +200,7 @@ class TestCLIMain:
             remove_extension=True
         )
     
-    @patch('src.installer.cli.UniversalInstaller')
+    @patch('src.installer.installer.UniversalInstaller')
     def test_no_file_provided(self, mock_installer_class):
         """Test behavior when no file is provided"""
         mock_installer = MagicMock()
@@ -6,33 +6,41 @@ Additional tests for history module to improve coverage
 import pytest
 import json
 import os
-import sys
 from pathlib import Path
 from datetime import datetime
 from unittest.mock import patch, mock_open, MagicMock
 
-# Add the parent directory to the path to import our module
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from src.installer.history import HistoryManager
 from src.installer.exceptions import ValidationError, PermissionError, InstallationError
 
+from tests.data import (
+    EMPTY_HISTORY,
+    INVALID_JOURNAL_RE,
+    INVALID_JSON_RE,
+    MISSING_KEYS_RE,
+    NO_SPACE_RE,
+    PERMISSION_DENIED_RE,
+)
+
+
+@pytest.fixture
+def history(history_file):
+    """A HistoryManager backed by a fresh history file"""
+    return HistoryManager(str(history_file))
+
 
 class TestHistoryDisplay:
     """Test history display functionality"""
     
-    def test_display_empty_history(self, tmp_path, capsys):
+    def test_display_empty_history(self, history, capsys):
         """Test displaying empty history"""
-        history = HistoryManager(str(tmp_path / "history.json"))
         history.display_history()
         
         captured = capsys.readouterr()
         assert "No files currently tracked as installed" in captured.out
     
-    def test_display_history_with_entries(self, tmp_path, capsys):
+    def test_display_history_with_entries(self, history, capsys):
         """Test displaying history with entries"""
-        history = HistoryManager(str(tmp_path / "history.json"))
-        
         # Add some installations
         history.add_installation(
             Path("/tmp/source.py"),
@@ -50,10 +58,8 @@ class TestHistoryDisplay:
         assert "Destination" in captured.out
         assert "/usr/local/bin/mytool" in captured.out
     
-    def test_display_all_history(self, tmp_path, capsys):
+    def test_display_all_history(self, history, capsys):
         """Test displaying all history entries"""
-        history = HistoryManager(str(tmp_path / "history.json"))
-        
         # Add installation and uninstallation
         history.add_installation(
             Path("/tmp/source.py"),
@@ -73,17 +79,13 @@ class TestHistoryDisplay:
         assert "Destination:" in captured.out
         assert "Checksum:" in captured.out
     
-    def test_display_history_with_limit(self, tmp_path, capsys):
+    def test_display_history_with_limit(self, history, capsys):
         """Test history display with limit"""
-        history = HistoryManager(str(tmp_path / "history.json"))
-        
-        # Add many entries
-        for i in range(30):
-            history.add_installation(
-                Path(f"/tmp/source{i}.py"),
-                Path(f"/usr/local/bin/tool{i}"),
-                "python"
-            )
+        # Add many entries in one batch
+        history.add_installations(
+            (Path(f"/tmp/source{i}.py"), Path(f"/usr/local/bin/tool{i}"), "python", None)
+            for i in range(11)
+        )
         
         history.display_history(show_all=True, limit=10)
         
@@ -94,9 +96,8 @@ class TestHistoryDisplay:
 class TestHistorySearch:
     """Test history search functionality"""
     
-    def test_search_no_results(self, tmp_path, capsys):
+    def test_search_no_results(self, history, capsys):
         """Test search with no results"""
-        history = HistoryManager(str(tmp_path / "history.json"))
         history.add_installation(
             Path("/tmp/source.py"),
             Path("/usr/local/bin/mytool"),
@@ -108,10 +109,8 @@ class TestHistorySearch:
         captured = capsys.readouterr()
         assert "No history entries found matching 'nonexistent'" in captured.out
     
-    def test_search_with_results(self, tmp_path, capsys):
+    def test_search_with_results(self, history, capsys):
         """Test search with results"""
-        history = HistoryManager(str(tmp_path / "history.json"))
-        
         # Add various entries
         history.add_installation(
             Path("/tmp/myapp.py"),
@@ -133,53 +132,62 @@ class TestHistorySearch:
         assert "INSTALL" in captured.out
         assert "UNINSTALL" in captured.out
         # Should not include 'other'
-        assert captured.out.count("other") == 0
+        assert "other" not in captured.out
+
+    def test_search_is_literal_and_case_insensitive(self, history, capsys):
+        """Test that queries match case-insensitively and are not treated as regexes"""
+        history.add_installation(Path("/tmp/My.App.py"), Path("/usr/local/bin/My.App"), "python")
+        history.add_installation(Path("/tmp/myxapp.py"), Path("/usr/local/bin/myxapp"), "python")
+
+        history.search_history("my.app")
+
+        captured = capsys.readouterr()
+        assert "My.App" in captured.out
+        assert "myxapp" not in captured.out
 
 
 class TestHistoryErrorCases:
     """Test error handling in history module"""
     
-    def test_load_corrupted_json(self, tmp_path):
+    def test_load_corrupted_json(self, history_file):
         """Test loading corrupted JSON file"""
-        history_file = tmp_path / "history.json"
         history_file.write_text("{invalid json")
         
-        with pytest.raises(ValidationError, match="Invalid JSON"):
-            HistoryManager(str(history_file))
+        with pytest.raises(ValidationError, match=INVALID_JSON_RE):
+            HistoryManager(str(history_file)).history
     
-    def test_load_invalid_structure(self, tmp_path):
+    def test_load_invalid_structure(self, history_file):
         """Test loading JSON with invalid structure"""
-        history_file = tmp_path / "history.json"
         history_file.write_text('{"wrong": "structure"}')
         
-        with pytest.raises(ValidationError, match="missing required keys"):
-            HistoryManager(str(history_file))
+        with pytest.raises(ValidationError, match=MISSING_KEYS_RE):
+            HistoryManager(str(history_file)).history
     
-    def test_save_permission_denied(self, tmp_path):
+    def test_save_permission_denied(self, history_file):
         """Test saving when permission denied"""
-        history = HistoryManager(str(tmp_path / "history.json"))
+        history = HistoryManager(str(history_file))
         
         # Mock the temp file creation to raise permission error
         with patch('tempfile.mkstemp', side_effect=OSError(13, "Permission denied")):
-            with pytest.raises(PermissionError, match="Permission denied"):
+            with pytest.raises(PermissionError, match=PERMISSION_DENIED_RE):
                 history.save_history()
     
-    def test_save_disk_full(self, tmp_path):
+    def test_save_disk_full(self, history_file):
         """Test saving when disk is full"""
-        history = HistoryManager(str(tmp_path / "history.json"))
+        history = HistoryManager(str(history_file))
         
         # Mock the temp file creation to raise disk full error
         with patch('tempfile.mkstemp', side_effect=OSError(28, "No space left on device")):
-            with pytest.raises(InstallationError, match="No space left on device"):
+            with pytest.raises(InstallationError, match=NO_SPACE_RE):
                 history.save_history()
 
 
 class TestHistoryFileOperations:
     """Test file operation edge cases"""
     
-    def test_history_file_permissions(self, tmp_path):
+    def test_history_file_permissions(self, history_file):
         """Test that history file gets correct permissions"""
-        history = HistoryManager(str(tmp_path / "history.json"))
+        history = HistoryManager(str(history_file))
         history.save_history()
         
         # Check file was created with correct permissions
@@ -187,9 +195,48 @@ class TestHistoryFileOperations:
         stat_info = history.history_file.stat()
         assert oct(stat_info.st_mode)[-3:] == '644'
     
-    def test_get_installed_files_with_duplicates(self, tmp_path):
+    def test_init_does_not_touch_filesystem(self, tmp_path, monkeypatch):
+        """Test that constructing a manager creates nothing until history is written"""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        with patch('os.geteuid', return_value=1000):
+            history = HistoryManager()
+
+        assert history.history_file.parent == tmp_path / ".local/share/installer"
+        assert not history.history_file.parent.exists()
+        assert history.history == EMPTY_HISTORY
+
+        history.add_uninstallation(Path("/usr/local/bin/a"))
+        assert history.journal_file.exists()
+
+    def test_no_fsync_by_default(self, history_file, monkeypatch):
+        """Test that journal appends skip fsync unless durability is requested"""
+        monkeypatch.delenv("INSTALLER_HISTORY_FSYNC", raising=False)
+        history = HistoryManager(str(history_file))
+
+        with patch('os.fsync') as mock_fsync:
+            history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+        mock_fsync.assert_not_called()
+
+        # The snapshot is synced regardless, as compaction empties the journal
+        with patch('os.fsync') as mock_fsync:
+            history.save_history()
+        mock_fsync.assert_called_once()
+
+    def test_fsync_when_durable(self, history_file, monkeypatch):
+        """Test that INSTALLER_HISTORY_FSYNC=1 makes every write durable"""
+        monkeypatch.setenv("INSTALLER_HISTORY_FSYNC", "1")
+        history = HistoryManager(str(history_file))
+        assert history.durable
+
+        with patch('os.fsync') as mock_fsync:
+            history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+            history.save_history()
+
+        assert mock_fsync.call_count == 2
+
+    def test_get_installed_files_with_duplicates(self, history_file):
         """Test get_installed_files handles duplicates correctly"""
-        history = HistoryManager(str(tmp_path / "history.json"))
+        history = HistoryManager(str(history_file))
         
         # Install same file multiple times
         target = Path("/usr/local/bin/mytool")
@@ -202,6 +249,241 @@ class TestHistoryFileOperations:
         # Should have the latest installation
         assert installed[str(target)]["source"] == "/tmp/v2.py"
 
+    def test_get_installed_files_reinstall_after_uninstall(self, history_file):
+        """Test that a file reinstalled after an uninstall is tracked as installed"""
+        history = HistoryManager(str(history_file))
+
+        target = Path("/usr/local/bin/mytool")
+        history.add_installation(Path("/tmp/v1.py"), target, "python")
+        history.add_uninstallation(target)
+        history.add_installation(Path("/tmp/v2.py"), target, "python")
+
+        installed = history.get_installed_files()
+        assert installed[str(target)]["source"] == "/tmp/v2.py"
+
+    def test_get_installed_files_out_of_order_entries(self, history):
+        """Test that entries journaled out of timestamp order are replayed by time"""
+        history.history = {
+            "installations": [
+                {"timestamp": "2024-01-01T00:00:00", "action": "install", "target": "/x"},
+                {"timestamp": "2024-01-01T00:03:00", "action": "install", "target": "/x"},
+                {"timestamp": "2024-01-01T00:01:00", "action": "install", "target": "/b"},
+            ],
+            "uninstallations": [
+                {"timestamp": "2024-01-01T00:02:00", "action": "uninstall", "target": "/x"},
+            ],
+        }
+
+        installed = history.get_installed_files()
+        assert set(installed) == {"/x", "/b"}
+        assert installed["/x"]["timestamp"] == "2024-01-01T00:03:00"
+
+    def test_get_installed_files_same_timestamp(self, history):
+        """Test that an uninstall sharing its install's timestamp wins, as in a forward replay"""
+        history.history = {
+            "installations": [
+                {"timestamp": "2024-01-01T00:00:00", "action": "install", "target": "/x"},
+            ],
+            "uninstallations": [
+                {"timestamp": "2024-01-01T00:00:00", "action": "uninstall", "target": "/x"},
+            ],
+        }
+
+        assert history.get_installed_files() == {}
+
+    def test_get_installed_files_missing_timestamp(self, history_file, capsys):
+        """Test that entries without a timestamp are listed and sort as oldest"""
+        history_file.write_text(json.dumps({
+            "installations": [
+                {"action": "install", "target": "/x"},
+                {"action": "install", "target": "/y"},
+                {"timestamp": "2024-01-01T00:00:00", "action": "install", "target": "/y"},
+            ],
+            "uninstallations": [],
+        }))
+        history = HistoryManager(str(history_file))
+
+        installed = history.get_installed_files()
+        assert set(installed) == {"/x", "/y"}
+        assert installed["/y"]["timestamp"] == "2024-01-01T00:00:00"
+
+        history.display_history()
+        assert "unknown" in capsys.readouterr().out
+
+
+class TestHistoryJournal:
+    """Test the append-only history journal"""
+
+    def test_entries_are_appended_to_journal(self, history_file):
+        """Test that recording an entry appends one line without touching the snapshot"""
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+        history.add_uninstallation(Path("/usr/local/bin/a"))
+
+        assert not history.history_file.exists()
+        lines = history.journal_file.read_text().splitlines()
+        assert [json.loads(line)["action"] for line in lines] == ["install", "uninstall"]
+
+    def test_journal_is_replayed_on_load(self, history_file):
+        """Test that a new manager sees snapshot and journal entries"""
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+        history.save_history()
+        history.add_installation(Path("/tmp/b.py"), Path("/usr/local/bin/b"), "python")
+        history.add_uninstallation(Path("/usr/local/bin/a"))
+
+        reloaded = HistoryManager(str(history_file))
+        assert reloaded.history == history.history
+
+    def test_save_history_truncates_journal(self, history_file):
+        """Test that saving folds the journal into the snapshot"""
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+        history.save_history()
+
+        assert history.journal_file.stat().st_size == 0
+        data = json.loads(history.history_file.read_text())
+        assert len(data["installations"]) == 1
+
+    def test_save_keeps_entries_from_other_managers(self, history_file):
+        """Test that saving a stale manager does not drop entries journaled since it loaded"""
+        first = HistoryManager(str(history_file))
+        second = HistoryManager(str(history_file))
+        assert first.history == EMPTY_HISTORY
+
+        second.add_installation(Path("/tmp/b.py"), Path("/usr/local/bin/b"), "python")
+        first.save_history()
+
+        reloaded = HistoryManager(str(history_file))
+        assert [e["target"] for e in reloaded.history["installations"]] == ["/usr/local/bin/b"]
+        assert first.journal_file.stat().st_size == 0
+
+    def test_journal_compaction(self, history_file):
+        """Test that an oversized journal is compacted, keeping other writers' entries"""
+        path = str(history_file)
+        first = HistoryManager(path)
+        second = HistoryManager(path)
+        first.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+
+        with patch('src.installer.history.HISTORY_JOURNAL_MAX_BYTES', 1):
+            second.add_installation(Path("/tmp/b.py"), Path("/usr/local/bin/b"), "python")
+
+        assert second.journal_file.stat().st_size == 0
+        targets = {e["target"] for e in HistoryManager(path).history["installations"]}
+        assert targets == {"/usr/local/bin/a", "/usr/local/bin/b"}
+        assert len(second.history["installations"]) == 2
+
+    def test_add_installations_batch(self, history_file):
+        """Test that a batch shares one timestamp and lands in one journal write"""
+        history = HistoryManager(str(history_file))
+
+        with patch('os.write', wraps=os.write) as mock_write:
+            history.add_installations(
+                (Path(f"/tmp/s{i}.py"), Path(f"/usr/local/bin/t{i}"), "python", None)
+                for i in range(3)
+            )
+
+        assert mock_write.call_count == 1
+        entries = HistoryManager(str(history_file)).history["installations"]
+        assert [e["target"] for e in entries] == [f"/usr/local/bin/t{i}" for i in range(3)]
+        assert len({e["timestamp"] for e in entries}) == 1
+
+    def test_torn_journal_tail(self, history_file):
+        """Test that a partial last line is skipped and cut before the next append"""
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+        with open(history.journal_file, "ab") as journal:
+            journal.write(b'{"timestamp": "2024-01-01T1')
+
+        assert len(HistoryManager(str(history_file)).history["installations"]) == 1
+
+        history.add_installation(Path("/tmp/b.py"), Path("/usr/local/bin/b"), "python")
+
+        reloaded = HistoryManager(str(history_file))
+        targets = [e["target"] for e in reloaded.history["installations"]]
+        assert targets == ["/usr/local/bin/a", "/usr/local/bin/b"]
+        reloaded.save_history()
+        assert len(reloaded.history["installations"]) == 2
+
+    def test_unterminated_journal_entry_is_kept(self, history_file):
+        """Test that a complete last entry missing its newline survives the next append"""
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+        history.journal_file.write_bytes(history.journal_file.read_bytes().rstrip(b"\n"))
+
+        history.add_installation(Path("/tmp/b.py"), Path("/usr/local/bin/b"), "python")
+
+        entries = HistoryManager(str(history_file)).history["installations"]
+        assert [e["target"] for e in entries] == ["/usr/local/bin/a", "/usr/local/bin/b"]
+
+    def test_short_journal_writes_are_retried(self, history_file, monkeypatch):
+        """Test that an append completes even when os.write writes only part of it"""
+        real_write = os.write
+        monkeypatch.setattr(os, "write", lambda fd, data: real_write(fd, data[:16]))
+
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+        monkeypatch.undo()
+
+        entries = HistoryManager(str(history_file)).history["installations"]
+        assert [e["target"] for e in entries] == ["/usr/local/bin/a"]
+
+    def test_recording_does_not_load_history(self, history_file):
+        """Test that appending an entry never parses the existing history"""
+        history_file.write_text("{invalid json")
+
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python")
+
+        assert len(history.journal_file.read_text().splitlines()) == 1
+
+    def test_load_corrupted_journal(self, history_file):
+        """Test loading a journal with an invalid line"""
+        history_file.with_name("history.json.journal").write_text("{invalid json\n")
+
+        with pytest.raises(ValidationError, match=INVALID_JOURNAL_RE):
+            HistoryManager(str(history_file)).history
+
+
+@pytest.fixture(params=["json", "orjson"])
+def json_backend(request, monkeypatch):
+    """Run a test against both serialization backends"""
+    import src.installer.history as history_module
+    if request.param == "orjson":
+        monkeypatch.setattr(history_module, "orjson", pytest.importorskip("orjson"))
+    else:
+        monkeypatch.setattr(history_module, "orjson", None)
+    return request.param
+
+
+class TestHistorySerialization:
+    """Test that both JSON backends read and write the same history"""
+    
+    def test_round_trip(self, json_backend, history_file):
+        """Test that snapshot and journal entries survive a reload"""
+        history = HistoryManager(str(history_file))
+        history.add_installation(Path("/tmp/a.py"), Path("/usr/local/bin/a"), "python", "abc")
+        history.save_history()
+        history.add_uninstallation(Path("/usr/local/bin/a"))
+        
+        reloaded = HistoryManager(str(history_file))
+        assert reloaded.history == history.history
+        assert json.loads(history_file.read_text())["installations"][0]["checksum"] == "abc"
+    
+    def test_invalid_snapshot(self, json_backend, history_file):
+        """Test that malformed snapshots raise ValidationError with either backend"""
+        history_file.write_text("{invalid json")
+        
+        with pytest.raises(ValidationError, match=INVALID_JSON_RE):
+            HistoryManager(str(history_file)).history
+    
+    def test_invalid_journal(self, json_backend, history_file):
+        """Test that malformed journal lines raise ValidationError with either backend"""
+        history_file.with_name("history.json.journal").write_bytes(b"{invalid json\n")
+        
+        with pytest.raises(ValidationError, match=INVALID_JOURNAL_RE):
+            HistoryManager(str(history_file)).history
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])